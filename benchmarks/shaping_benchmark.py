@@ -0,0 +1,250 @@
+"""
+Mixes bulk streams with latency-sensitive pings on one tunnel and reports
+ping p50/p99 and bulk throughput.
+
+Every connection runs through the real forward handler's _redirect loop. The
+SSH channel is faked with a socketpair, and all server -> client traffic has
+to cross one shared, serialized link (standing in for the SSH transport).
+Small socket buffers play the part of the per-channel SSH window.
+
+Cases:
+- unshaped: sshtunnel's stock handler.
+- client limit: CLIENT_RATE_LIMIT on each connection.
+- fair scheduler: TUNNEL_RATE_LIMIT below the link rate.
+
+Run from the repo root:
+	python -m benchmarks.shaping_benchmark [--link-rate BYTES] [--tunnel-rate BYTES] [--bulk N] [--seconds S]
+"""
+import argparse
+import logging
+import socket
+import threading
+import time
+from select import select
+
+import sshtunnel
+
+from rds_tunnel.shaping import FairScheduler, TokenBucket, _ShapedForwardHandler
+
+CHUNK = 16384
+PING = 64
+WINDOW = 65536
+
+class SerialLink:
+	"""A saturable link: transmissions go out one at a time, in arrival order."""
+	def __init__(self, rate):
+		self.rate = rate
+		self._cond = threading.Condition()
+		self._next_ticket = 0
+		self._serving = 0
+
+	def transmit(self, nbytes):
+		with self._cond:
+			ticket = self._next_ticket
+			self._next_ticket += 1
+			while self._serving != ticket:
+				self._cond.wait()
+		time.sleep(nbytes / self.rate)
+		with self._cond:
+			self._serving += 1
+			self._cond.notify_all()
+
+class FakeChannel:
+	"""Just enough of a paramiko Channel, backed by one end of a socketpair."""
+	def __init__(self, sock):
+		self.sock = sock
+		self.active = True
+
+	def fileno(self):
+		return self.sock.fileno()
+
+	def recv_ready(self):
+		# Mirrors paramiko: readable but nothing to read means the remote closed.
+		# Non-blocking mode is toggled instead of MSG_DONTWAIT, which Windows lacks;
+		# only the handler thread uses the channel, so this is safe.
+		self.sock.setblocking(False)
+		try:
+			return bool(self.sock.recv(1, socket.MSG_PEEK))
+		except BlockingIOError:
+			return True
+		finally:
+			self.sock.setblocking(True)
+
+	def recv(self, nbytes):
+		return self.sock.recv(nbytes)
+
+	def sendall(self, data):
+		self.sock.sendall(data)
+
+	def close(self):
+		self.active = False
+		self.sock.close()
+
+def small_socketpair():
+	a, b = socket.socketpair()
+	for s in (a, b):
+		s.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, WINDOW)
+		s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, WINDOW)
+	return a, b
+
+def recv_exact(sock, nbytes):
+	data = b''
+	while len(data) < nbytes:
+		part = sock.recv(nbytes - len(data))
+		if not part:
+			return None
+		data += part
+	return data
+
+def percentile(samples, pct):
+	ordered = sorted(samples)
+	return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def open_connection(handler_class):
+	"""
+	Wires app <-> handler <-> fake channel <-> server and runs _redirect in a
+	thread. Returns (app socket, server socket, handler thread).
+	"""
+	app, request = small_socketpair()
+	chan_sock, server = small_socketpair()
+	chan = FakeChannel(chan_sock)
+	handler = handler_class.__new__(handler_class)
+	handler.request = request
+	handler.info = 'benchmark'
+
+	def run():
+		try:
+			handler._redirect(chan)
+		except OSError:
+			pass
+		finally:
+			chan.close()
+			request.close()
+
+	thread = threading.Thread(target=run, daemon=True)
+	thread.start()
+	return app, server, thread
+
+def run(handler_class, link, bulk_streams, seconds, ping_interval):
+	"""Runs bulk streams and one pinger through handler_class. Returns (ping latencies, bulk bytes/sec)."""
+	stop = threading.Event()
+	received = [0]
+	latencies = []
+	threads = []
+
+	def bulk_server(server):
+		chunk = b'x' * CHUNK
+		try:
+			while not stop.is_set():
+				# Like an SSH server, only put data on the link once the window has room.
+				_, writable, _ = select([], [server], [], 0.1)
+				if not writable:
+					continue
+				link.transmit(CHUNK)
+				server.sendall(chunk)
+		except OSError:
+			pass
+		finally:
+			server.close()
+
+	def bulk_client(app):
+		while True:
+			data = app.recv(CHUNK)
+			if not data:
+				break
+			received[0] += len(data)
+		app.close()
+
+	def ping_server(server):
+		try:
+			while True:
+				data = recv_exact(server, PING)
+				if data is None:
+					break
+				link.transmit(PING)
+				server.sendall(data)
+		except OSError:
+			pass
+		finally:
+			server.close()
+
+	def ping_client(app):
+		payload = b'p' * PING
+		while not stop.is_set():
+			start = time.monotonic()
+			app.sendall(payload)
+			if recv_exact(app, PING) is None:
+				break
+			latencies.append(time.monotonic() - start)
+			time.sleep(ping_interval)
+		app.close()
+
+	def start(target, arg):
+		thread = threading.Thread(target=target, args=(arg,), daemon=True)
+		thread.start()
+		threads.append(thread)
+
+	for _ in range(bulk_streams):
+		app, server, handler = open_connection(handler_class)
+		threads.append(handler)
+		start(bulk_server, server)
+		start(bulk_client, app)
+	app, server, handler = open_connection(handler_class)
+	threads.append(handler)
+	start(ping_server, server)
+	start(ping_client, app)
+
+	# Let the bulk streams fill their windows before pings are counted.
+	time.sleep(0.5)
+	latencies.clear()
+	received[0] = 0
+	time.sleep(seconds)
+	throughput = received[0] / seconds
+	stop.set()
+	for t in threads:
+		t.join(timeout=5)
+	return latencies, throughput
+
+def main():
+	parser = argparse.ArgumentParser(description="Ping latency under bulk load through the shaped forward handler")
+	parser.add_argument('--link-rate', type=int, default=8 * 1024 * 1024, help='Shared link rate in bytes/sec')
+	parser.add_argument('--tunnel-rate', type=int, default=6 * 1024 * 1024, help='TUNNEL_RATE_LIMIT in bytes/sec')
+	parser.add_argument('--client-rate', type=int, default=1024 * 1024, help='CLIENT_RATE_LIMIT in bytes/sec')
+	parser.add_argument('--bulk', type=int, default=4, help='Number of concurrent bulk streams')
+	parser.add_argument('--seconds', type=float, default=5.0, help='Duration of each run')
+	parser.add_argument('--ping-interval', type=float, default=0.01, help='Seconds between pings')
+	args = parser.parse_args()
+
+	def unshaped():
+		class Handler(sshtunnel._ForwardHandler):
+			logger = logging.getLogger('benchmark')
+		return Handler
+
+	def client_limit():
+		class Handler(_ShapedForwardHandler):
+			client_rate = args.client_rate
+		return Handler
+
+	def fair():
+		class Handler(_ShapedForwardHandler):
+			scheduler = FairScheduler(TokenBucket(args.tunnel_rate))
+		return Handler
+
+	print(
+		f"link={args.link_rate} B/s tunnel_limit={args.tunnel_rate} B/s client_limit={args.client_rate} B/s "
+		f"bulk_streams={args.bulk} seconds={args.seconds}"
+	)
+	for name, make_handler in (("unshaped", unshaped), ("client limit", client_limit), ("fair scheduler", fair)):
+		latencies, throughput = run(make_handler(), SerialLink(args.link_rate), args.bulk, args.seconds, args.ping_interval)
+		if not latencies:
+			print(f"{name:>15}: no pings completed")
+			continue
+		print(
+			f"{name:>15}: pings={len(latencies)} "
+			f"p50={percentile(latencies, 50) * 1000:.2f}ms "
+			f"p99={percentile(latencies, 99) * 1000:.2f}ms "
+			f"bulk={throughput / 1024:.0f} KiB/s"
+		)
+
+if __name__ == '__main__':
+	main()
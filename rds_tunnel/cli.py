@@ -23,7 +23,7 @@ import logging
 import time
 
 from .config_manager import ConfigManager
-from .tunnel_manager import start_tunnel_process, test_db_connection
+from .tunnel_manager import resolve_profiles, start_tunnel_process, start_tunnels, test_db_connection, test_db_connections
 from .daemon import daemonize
 from .garbage_collection import collector, clean
 
@@ -115,6 +115,64 @@ def main(args):
 		if os.path.exists(state_file):
 			os.remove(state_file)
 
+def main_profiles(args, names=None):
+	"""Daemon execution logic for several profiles sharing one process."""
+	state_file = os.path.expanduser("~/.rdstunnel.state")
+
+	def sigterm_handler(_signum, _frame):
+		raise KeyboardInterrupt
+
+	signal.signal(signal.SIGTERM, sigterm_handler)
+
+	config_manager = ConfigManager(config_path=args.config_file)
+	profiles = config_manager.load_profiles(names)
+	if not profiles:
+		cli_logger.error("❌ No profiles could be loaded. Exiting.")
+		if os.path.exists(state_file):
+			os.remove(state_file)
+		sys.exit(1)
+
+	configs = resolve_profiles(config_manager, profiles)
+	ports = {}
+	for name, config in configs.items():
+		if config:
+			ports.setdefault(config['LOCAL_PORT'], []).append(name)
+	conflicts = {port: port_names for port, port_names in ports.items() if len(port_names) > 1}
+	if conflicts:
+		for port, port_names in conflicts.items():
+			cli_logger.error(f"❌ Profiles {', '.join(port_names)} all use LOCAL_PORT {port}. Give each profile its own port.")
+		if os.path.exists(state_file):
+			os.remove(state_file)
+		sys.exit(1)
+
+	cli_logger.info(f"Starting tunnels for profiles: {', '.join(profiles)}")
+	tunnels = start_tunnels({name: config for name, config in configs.items() if config})
+	for name, (_tunnel, config) in tunnels.items():
+		cli_logger.info(f"[{name}] Tunnel bound to 127.0.0.1:{config['LOCAL_PORT']}")
+	for name in profiles:
+		if name not in tunnels:
+			cli_logger.error(f"❌ [{name}] Tunnel failed to start.")
+	if not tunnels:
+		cli_logger.error("❌ No tunnels could be started. Exiting.")
+		if os.path.exists(state_file):
+			os.remove(state_file)
+		sys.exit(1)
+
+	try:
+		cli_logger.info("Tunnels are active. The main process will now run in the background to keep them alive.")
+		while True:
+			time.sleep(1)
+	except KeyboardInterrupt:
+		cli_logger.warning("⏹️  Interrupt - Main app terminated.")
+	except Exception as e:
+		cli_logger.error(f"❌ An error occurred during main execution: {e}")
+	finally:
+		for name, (tunnel, _config) in tunnels.items():
+			cli_logger.warning(f"[{name}] Shutting down tunnel...")
+			tunnel.stop()
+		if os.path.exists(state_file):
+			os.remove(state_file)
+
 
 def cli():
 	"""Handles the command-line interface logic."""
@@ -126,6 +184,12 @@ def cli():
 	# Start command
 	start_parser = subparsers.add_parser('start', help='Start the RDS tunnel daemon')
 	start_parser.add_argument('--config-file', type=str, help='Specify a custom configuration file path')
+	start_parser.add_argument('--all', action='store_true', help='Start every profile in the configuration file concurrently')
+
+	# Up command
+	up_parser = subparsers.add_parser('up', help='Start one or more named profiles concurrently')
+	up_parser.add_argument('profiles', nargs='+', help='Names of the profiles to start')
+	up_parser.add_argument('--config-file', type=str, help='Specify a custom configuration file path')
 
 	# Stop command
 	stop_parser = subparsers.add_parser('stop', help='Stop the RDS tunnel daemon')
@@ -165,7 +229,14 @@ def cli():
 		parser.print_help()
 		sys.exit(0)
 
-	if args.command == 'start':
+	if args.command in ('start', 'up'):
+		if args.command == 'up':
+			profile_names = args.profiles
+		elif args.all:
+			profile_names = []
+		else:
+			profile_names = None
+
 		if os.path.exists(state_file):
 			with open(state_file, 'r') as f:
 				try:
@@ -189,6 +260,8 @@ def cli():
 		
 		config_path_to_save = args.config_file or user_config_path
 		state = {"pid": os.getpid(), "config_file": os.path.abspath(config_path_to_save)}
+		if profile_names is not None:
+			state["profiles"] = profile_names
 		with open(state_file, 'w') as f:
 			json.dump(state, f)
 		
@@ -199,7 +272,10 @@ def cli():
 		os.dup2(log_file.fileno(), sys.stdout.fileno())
 		os.dup2(log_file.fileno(), sys.stderr.fileno())
 		
-		main(args)
+		if profile_names is None:
+			main(args)
+		else:
+			main_profiles(args, profile_names)
 
 	elif args.command == 'stop':
 		if not os.path.exists(state_file):
@@ -237,6 +313,7 @@ def cli():
 				state = json.load(f)
 				pid = state.get("pid")
 				config_path = state.get("config_file")
+				profile_names = state.get("profiles")
 		except (json.JSONDecodeError, FileNotFoundError):
 			cli_logger.info("Tunnel: Inactive (Could not read state file)")
 			sys.exit(1)
@@ -248,6 +325,21 @@ def cli():
 		try:
 			os.kill(pid, 0)
 			cli_logger.info("Tunnel: Active")
+			if profile_names is not None:
+				config_manager = ConfigManager(config_path)
+				profiles = config_manager.load_profiles(profile_names)
+				configs = resolve_profiles(config_manager, profiles)
+				results = test_db_connections({name: config for name, config in configs.items() if config})
+				for name, config in configs.items():
+					if name not in results:
+						cli_logger.info(f"[{name}] Database: Unknown (Could not load config)")
+					elif results[name]:
+						cli_logger.info(f"[{name}] Database: Connected")
+						cli_logger.info(f"  - Bound to: 127.0.0.1:{config.get('LOCAL_PORT')}")
+					else:
+						cli_logger.info(f"[{name}] Database: Disconnected")
+				sys.exit(0)
+
 			config = ConfigManager(config_path).load_config()
 			if not config:
 				cli_logger.info("Database: Unknown (Could not load config)")
@@ -6,6 +6,11 @@ import boto3
 config_logger = logging.getLogger('config.loader')
 aws_logger = logging.getLogger('aws.boto3')
 
+REQUIRED_KEYS = ['SSH_HOST', 'SSH_USER', 'SSH_PRIVATE_KEY_PATH', 'DB_HOST', 'DB_PORT', 'DB_USER', 'DB_PASSWORD', 'DB_NAME', 'LOCAL_PORT']
+OPTIONAL_KEYS = ['TUNNEL_RATE_LIMIT', 'CLIENT_RATE_LIMIT']
+# Top-level keys a profile with its own secret may still inherit
+SHARED_KEYS = ['SSH_USER', 'SSH_PRIVATE_KEY_PATH', 'TUNNEL_RATE_LIMIT', 'CLIENT_RATE_LIMIT']
+
 class ConfigManager:
 	"""Manages application configuration, including file loading and secrets fetching."""
 	def __init__(self, config_path=None):
@@ -20,7 +25,6 @@ class ConfigManager:
 	def load_config(self):
 		"""Loads configuration from the JSON file."""
 		config = {}
-		keys = ['SSH_HOST', 'SSH_USER', 'SSH_PRIVATE_KEY_PATH', 'DB_HOST', 'DB_PORT', 'DB_USER', 'DB_PASSWORD', 'DB_NAME', 'LOCAL_PORT']
 
 		if not os.path.exists(self.config_path):
 			config_logger.warning(f"Config file not found at {self.config_path}")
@@ -30,27 +34,114 @@ class ConfigManager:
 		with open(self.config_path, 'r') as f:
 			file_config = json.load(f)
 		
-		for key in keys:
+		for key in REQUIRED_KEYS + OPTIONAL_KEYS:
 			config[key] = file_config.get(key)
 		
+		return self._finalize_config(config)
+
+	def load_profiles(self, names=None):
+		"""
+		Loads the named profiles from the "PROFILES" section of the JSON file.
+		Each profile keeps its own keys, with the top-level keys stored under
+		"DEFAULTS" for resolve_profile. If no names are given, all profiles
+		are returned.
+		"""
+		if not os.path.exists(self.config_path):
+			config_logger.warning(f"Config file not found at {self.config_path}")
+			return {}
+
+		config_logger.info(f"❓ Loading profiles from {self.config_path}")
+		with open(self.config_path, 'r') as f:
+			file_config = json.load(f)
+
+		available = file_config.get('PROFILES') or {}
+		defaults = {k: v for k, v in file_config.items() if k != 'PROFILES'}
+		profiles = {}
+		for name in (names or list(available)):
+			if name not in available:
+				config_logger.error(f"❌ Profile '{name}' not found in {self.config_path}")
+				continue
+			profiles[name] = {**available[name], 'DEFAULTS': defaults}
+		return profiles
+
+	def resolve_profile(self, name, profile):
+		"""
+		Builds a runnable config from a profile returned by load_profiles.
+		- If the profile names its own secret, values are taken from the profile,
+		  then that secret. Only SHARED_KEYS (and AWS_REGION) fall back to the
+		  top-level defaults; any other missing key raises a ValueError, so a
+		  profile never inherits another environment's hosts or credentials.
+		- Otherwise the top-level defaults are used, and the inherited secret (if
+		  any) only fills keys that are still empty.
+		Safe to call from several threads at once.
+		"""
+		defaults = profile.get('DEFAULTS') or {}
+		explicit = {k: v for k, v in profile.items() if k != 'DEFAULTS'}
+		keys = REQUIRED_KEYS + OPTIONAL_KEYS
+		region_name = explicit.get('AWS_REGION') or defaults.get('AWS_REGION') or 'us-east-1'
+
+		if explicit.get('SECRETS_MANAGER_SECRET_NAME'):
+			aws_logger.info(f"❓ [{name}] Fetching profile secret from Secrets Manager...")
+			secrets = self._get_secrets(explicit['SECRETS_MANAGER_SECRET_NAME'], region_name)
+			layers = [explicit, secrets, {k: v for k, v in defaults.items() if k in SHARED_KEYS}]
+		else:
+			layers = [explicit, defaults]
+
+		config = {}
+		for key in keys:
+			config[key] = next((layer[key] for layer in layers if layer.get(key)), None)
+
+		if explicit.get('SECRETS_MANAGER_SECRET_NAME'):
+			# Ports fall back to 3306 in _finalize_config, as they do everywhere else
+			missing = [key for key in REQUIRED_KEYS if key not in ('DB_PORT', 'LOCAL_PORT') and not config.get(key)]
+			if missing:
+				raise ValueError(f"Missing {', '.join(missing)} in profile '{name}' and its secret {explicit['SECRETS_MANAGER_SECRET_NAME']}")
+
+		secret_name = defaults.get('SECRETS_MANAGER_SECRET_NAME')
+		if not explicit.get('SECRETS_MANAGER_SECRET_NAME') and secret_name and not all(config.get(key) for key in REQUIRED_KEYS):
+			aws_logger.info(f"❓ [{name}] Config missing, fetching from Secrets Manager...")
+			secrets = self._get_secrets(secret_name, region_name)
+			for key in REQUIRED_KEYS:
+				if not config.get(key) and secrets.get(key):
+					config[key] = secrets[key]
+		return self._finalize_config(config, name)
+
+	def _finalize_config(self, config, name=None):
+		"""Applies port defaults and logs the (masked) resulting config."""
 		# Set defaults for ports
-		config['DB_PORT'] = int(config.get('DB_PORT', 3306))
-		config['LOCAL_PORT'] = int(config.get('LOCAL_PORT', 3306))
+		config['DB_PORT'] = int(config.get('DB_PORT') or 3306)
+		config['LOCAL_PORT'] = int(config.get('LOCAL_PORT') or 3306)
+		for key in OPTIONAL_KEYS:
+			if not config.get(key):
+				continue
+			try:
+				config[key] = int(config[key])
+				if config[key] <= 0:
+					raise ValueError
+			except (TypeError, ValueError):
+				prefix = f"[{name}] " if name else ""
+				config_logger.error(f"❌ {prefix}{key} must be a positive whole number of bytes/sec, got {config[key]!r}. Ignoring it.")
+				config[key] = None
 
 		# Mask password for logging
 		log_config = config.copy()
 		if 'DB_PASSWORD' in log_config:
 			log_config['DB_PASSWORD'] = '********'
-		config_logger.info(f"✅ Config Loaded: {log_config}")
+		prefix = f"[{name}] " if name else ""
+		config_logger.info(f"✅ {prefix}Config Loaded: {log_config}")
 		return config
 
+	def _get_secrets(self, secret_name, region_name):
+		"""Reads a JSON secret from AWS Secrets Manager."""
+		session = boto3.session.Session()
+		client = session.client(service_name='secretsmanager', region_name=region_name)
+		secret_value = client.get_secret_value(SecretId=secret_name)
+		return json.loads(secret_value['SecretString'])
+
 	def fetch_from_aws(self, secret_name, region_name):
 		"""Fetches configuration from AWS Secrets Manager and saves it."""
 		try:
-			session = boto3.session.Session()
-			client = session.client(service_name='secretsmanager', region_name=region_name)
-			secret_value = client.get_secret_value(SecretId=secret_name)
-			secrets = json.loads(secret_value['SecretString'])
+			secrets = self._get_secrets(secret_name, region_name)
 			with open(self.config_path, 'w') as f:
 				json.dump(secrets, f, indent=2)
 			print(f"✅ Configuration saved to {self.config_path}")
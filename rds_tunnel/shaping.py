@@ -0,0 +1,160 @@
+import time
+import heapq
+import itertools
+import threading
+from select import select
+
+import sshtunnel
+
+DEFAULT_BURST = 65536
+
+class TokenBucket:
+	"""
+	Thread-safe token bucket. Rates and sizes are in bytes.
+	The burst defaults to 64 KiB (or one second's worth, if lower) so a new or
+	idle connection can't push a whole second of traffic past the limit.
+	"""
+	def __init__(self, rate, burst=None):
+		self.rate = float(rate)
+		self.burst = float(burst or min(rate, DEFAULT_BURST))
+		self._tokens = self.burst
+		self._last = time.monotonic()
+		self._lock = threading.Lock()
+
+	def _refill(self):
+		now = time.monotonic()
+		self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+		self._last = now
+
+	def _delay(self, nbytes):
+		# Sends larger than the burst are let through once the bucket is full and
+		# paid back as debt, so a single big chunk can never block forever.
+		needed = min(nbytes, self.burst)
+		if self._tokens >= needed:
+			return 0.0
+		return (needed - self._tokens) / self.rate
+
+	def delay(self, nbytes):
+		"""Returns how many seconds until nbytes may be sent, without taking any tokens."""
+		with self._lock:
+			self._refill()
+			return self._delay(nbytes)
+
+	def take(self, nbytes):
+		"""Takes nbytes of tokens unconditionally."""
+		with self._lock:
+			self._refill()
+			self._tokens -= nbytes
+
+	def consume(self, nbytes):
+		"""Blocks until nbytes may be sent, then takes them."""
+		while True:
+			with self._lock:
+				self._refill()
+				wait = self._delay(nbytes)
+				if wait <= 0:
+					self._tokens -= nbytes
+					return
+			time.sleep(wait)
+
+class FairScheduler:
+	"""
+	Fair queuing over a shared TokenBucket.
+	Each send gets a virtual start and finish tag and the smallest finish tag
+	goes next. The virtual clock follows the start tag of the last send, so a
+	flow that has been idle - e.g. a short interactive query - is served ahead
+	of flows that are continuously backlogged, like a bulk export.
+	"""
+	def __init__(self, bucket):
+		self.bucket = bucket
+		self._cond = threading.Condition()
+		self._queue = []
+		self._finish = {}
+		self._vtime = 0.0
+		self._seq = itertools.count()
+
+	def acquire(self, flow, nbytes):
+		"""Blocks until it is this flow's turn and the bucket allows nbytes."""
+		with self._cond:
+			start = max(self._vtime, self._finish.get(flow, 0.0))
+			self._finish[flow] = start + nbytes
+			entry = (start + nbytes, next(self._seq))
+			heapq.heappush(self._queue, entry)
+			while True:
+				if self._queue[0] is entry:
+					wait = self.bucket.delay(nbytes)
+					if wait <= 0:
+						break
+					self._cond.wait(wait)
+				else:
+					self._cond.wait()
+			heapq.heappop(self._queue)
+			self.bucket.take(nbytes)
+			self._vtime = max(self._vtime, start)
+			self._cond.notify_all()
+
+	def release(self, flow):
+		"""Forgets a finished flow."""
+		with self._cond:
+			self._finish.pop(flow, None)
+
+class _ShapedForwardHandler(sshtunnel._ForwardHandler):
+	"""
+	Forward handler that rate limits each connection and schedules all
+	connections of one tunnel fairly. Mirrors sshtunnel's own _redirect loop.
+	"""
+	scheduler = None
+	client_rate = None
+	chunk_size = 16384
+
+	def _throttle(self, bucket, nbytes):
+		if bucket:
+			bucket.consume(nbytes)
+		if self.scheduler:
+			self.scheduler.acquire(self, nbytes)
+
+	def _redirect(self, chan):
+		bucket = TokenBucket(self.client_rate) if self.client_rate else None
+		try:
+			while chan.active:
+				rqst, _, _ = select([self.request, chan], [], [], 5)
+				if self.request in rqst:
+					data = self.request.recv(self.chunk_size)
+					if not data:
+						break
+					self._throttle(bucket, len(data))
+					chan.sendall(data)
+				if chan in rqst:
+					if not chan.recv_ready():
+						break
+					data = chan.recv(self.chunk_size)
+					# Holding off the next recv lets the channel's SSH window fill,
+					# which makes the server pause this channel instead of the transport.
+					self._throttle(bucket, len(data))
+					self.request.sendall(data)
+		finally:
+			if self.scheduler:
+				self.scheduler.release(self)
+
+class ShapedSSHTunnelForwarder(sshtunnel.SSHTunnelForwarder):
+	"""
+	SSHTunnelForwarder with bandwidth shaping.
+	- tunnel_rate: bytes/sec shared by every connection on this tunnel, handed
+	  out by a FairScheduler.
+	- client_rate: bytes/sec for each individual forwarded connection.
+	"""
+	def __init__(self, *args, tunnel_rate=None, client_rate=None, **kwargs):
+		self.client_rate = client_rate
+		self.scheduler = FairScheduler(TokenBucket(tunnel_rate)) if tunnel_rate else None
+		super().__init__(*args, **kwargs)
+
+	def _make_ssh_forward_handler_class(self, remote_address_):
+		forwarder = self
+
+		class Handler(_ShapedForwardHandler):
+			remote_address = remote_address_
+			ssh_transport = forwarder._transport
+			logger = forwarder.logger
+			scheduler = forwarder.scheduler
+			client_rate = forwarder.client_rate
+		return Handler
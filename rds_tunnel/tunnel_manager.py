@@ -1,23 +1,46 @@
 import time
 import sys
+import os
+import threading
 import multiprocessing
+from concurrent.futures import Future, ThreadPoolExecutor
 import sshtunnel
 import mysql.connector
 import logging
 
+from .shaping import ShapedSSHTunnelForwarder
+
 sshtunnel_logger = logging.getLogger('sshtunnel')
 mysql_logger = logging.getLogger('mysql.connector')
+config_logger = logging.getLogger('config.loader')
+
+def make_forwarder(config, ssh_pkey):
+	"""
+	Builds the SSH forwarder for a config. Shaping is only switched on when
+	TUNNEL_RATE_LIMIT or CLIENT_RATE_LIMIT (bytes/sec) is set.
+	"""
+	kwargs = dict(
+		ssh_username=config['SSH_USER'],
+		ssh_pkey=ssh_pkey,
+		remote_bind_address=(config['DB_HOST'], config['DB_PORT']),
+		local_bind_address=('127.0.0.1', config['LOCAL_PORT'])
+	)
+	tunnel_rate = config.get('TUNNEL_RATE_LIMIT')
+	client_rate = config.get('CLIENT_RATE_LIMIT')
+	if tunnel_rate or client_rate:
+		sshtunnel_logger.debug(f"Shaping enabled: tunnel={tunnel_rate} B/s, per client={client_rate} B/s")
+		return ShapedSSHTunnelForwarder(
+			(config['SSH_HOST'], 22),
+			tunnel_rate=tunnel_rate,
+			client_rate=client_rate,
+			**kwargs
+		)
+	return sshtunnel.SSHTunnelForwarder((config['SSH_HOST'], 22), **kwargs)
 
 def run_tunnel(config):
 	"""A function to start and maintain the SSH tunnel."""
 	try:
-		with sshtunnel.SSHTunnelForwarder(
-			(config['SSH_HOST'], 22),
-			ssh_username=config['SSH_USER'],
-			ssh_pkey=config['SSH_PRIVATE_KEY_PATH'],
-			remote_bind_address=(config['DB_HOST'], config['DB_PORT']),
-			local_bind_address=('127.0.0.1', config['LOCAL_PORT'])
-		) as tunnel:
+		with make_forwarder(config, config['SSH_PRIVATE_KEY_PATH']) as tunnel:
 			sshtunnel_logger.debug(f"✅ SSH tunnel started on localhost:{config['LOCAL_PORT']}")
 			while tunnel.is_active:
 				time.sleep(1)
@@ -55,4 +78,98 @@ def start_tunnel_process(config):
 	"""Starts the tunnel in a separate multiprocessing process."""
 	tunnel_process = multiprocessing.Process(target=run_tunnel, args=(config,), daemon=True)
 	tunnel_process.start()
-	return tunnel_process
\ No newline at end of file
+	return tunnel_process
+
+_pkey_cache = {}
+_pkey_cache_lock = threading.Lock()
+
+def load_private_key(key_path):
+	"""
+	Parses an SSH private key once per path. Concurrent callers asking for the
+	same key wait on the first parse instead of decrypting it again.
+	"""
+	key_path = os.path.abspath(os.path.expanduser(key_path))
+	with _pkey_cache_lock:
+		pending = _pkey_cache.get(key_path)
+		owner = pending is None
+		if owner:
+			pending = _pkey_cache[key_path] = Future()
+
+	if owner:
+		try:
+			pkey = sshtunnel.SSHTunnelForwarder.read_private_key_file(key_path, logger=sshtunnel_logger)
+			if pkey is None:
+				raise ValueError(f"Could not load private key from {key_path}")
+			pending.set_result(pkey)
+		except Exception as e:
+			pending.set_exception(e)
+	return pending.result()
+
+def open_tunnel(config):
+	"""Starts an SSH tunnel in the current process and returns the running forwarder."""
+	tunnel = make_forwarder(config, load_private_key(config['SSH_PRIVATE_KEY_PATH']))
+	# start() returns once the SSH handshake is done and the local port is bound
+	try:
+		tunnel.start()
+	except Exception:
+		# The SSH session is opened before the local port is bound, so a bind
+		# failure would otherwise leave it running for the daemon's lifetime.
+		tunnel.stop(force=True)
+		raise
+	sshtunnel_logger.debug(f"✅ SSH tunnel started on localhost:{config['LOCAL_PORT']}")
+	return tunnel
+
+def start_profile(name, config):
+	"""Opens and health-checks a single profile's tunnel."""
+	try:
+		tunnel = open_tunnel(config)
+	except Exception as e:
+		sshtunnel_logger.error(f"❌ [{name}] Tunnel error: {e}")
+		return None
+	test_db_connection(config)
+	return tunnel, config
+
+def _resolve_or_none(config_manager, name, profile):
+	try:
+		return config_manager.resolve_profile(name, profile)
+	except Exception as e:
+		config_logger.error(f"❌ [{name}] Could not resolve config: {e}")
+		return None
+
+def resolve_profiles(config_manager, profiles):
+	"""
+	Resolves several profiles concurrently, so their Secrets Manager lookups
+	overlap. Returns {name: config}, with None for profiles that failed.
+	"""
+	if not profiles:
+		return {}
+	with ThreadPoolExecutor(max_workers=len(profiles)) as executor:
+		futures = {
+			name: executor.submit(_resolve_or_none, config_manager, name, profile)
+			for name, profile in profiles.items()
+		}
+	return {name: f.result() for name, f in futures.items()}
+
+def start_tunnels(configs):
+	"""
+	Brings up several resolved profiles concurrently in this process. Key
+	parsing, SSH handshakes and DB health checks all overlap, so total startup
+	is bounded by the slowest profile. Returns {name: (tunnel, config)} for the
+	profiles that came up.
+	"""
+	if not configs:
+		return {}
+	with ThreadPoolExecutor(max_workers=len(configs)) as executor:
+		futures = {
+			name: executor.submit(start_profile, name, config)
+			for name, config in configs.items()
+		}
+	return {name: f.result() for name, f in futures.items() if f.result()}
+
+def test_db_connections(configs):
+	"""Tests several {name: config} DB connections concurrently. Returns {name: bool}."""
+	if not configs:
+		return {}
+	with ThreadPoolExecutor(max_workers=len(configs)) as executor:
+		futures = {name: executor.submit(test_db_connection, config) for name, config in configs.items()}
+	return {name: f.result() for name, f in futures.items()}